@@ -1,3 +1,6 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
 from modules import BipartiteMatching, IOTable, MaximumFlow
 from modules import DulmageMendelsohnDecomposition as DMDecomp
 
@@ -41,18 +44,20 @@ io_table = IOTable("data/io_table.xlsx")
 # io_table.get_filtered_intermediate(90)
 # io_table.get_filtered_intermediate(30, by_row=True)
 io_table.filter_by_count(20, by_row=True)
-matrix = io_table.filtered_intermediate_df.to_numpy()
-matrix = io_table.filtered_intermediate_df.to_numpy()
-matrix[matrix != 0] = 1  # 0以外の値をすべて1に置き換え
+# 0以外の値をすべて1に置き換え
+matrix = (io_table.filtered_intermediate_df.to_numpy() != 0).astype(np.int8)
 print(matrix)
 
-bipartite_matching = BipartiteMatching(matrix)
+# 疎行列（CSR）を一度だけ作成し、各モジュールで共有する
+csr = csr_matrix(matrix)
+
+bipartite_matching = BipartiteMatching(csr)
 # bipartite_matching.solve()
 
-maximum_flow = MaximumFlow(matrix)
+maximum_flow = MaximumFlow(csr)
 maximum_flow.solve()
 print(len(maximum_flow.matching))
 
-dm_decomposition = DMDecomp(matrix, maximum_flow.matching)
+dm_decomposition = DMDecomp(csr, maximum_flow.matched_col_of_row)
 dm_decomposition.solve()
 dm_decomposition.print_summary()
@@ -1,52 +1,104 @@
+from collections import deque
+
 import numpy as np
-from mip import BINARY, Model, OptimizationStatus, xsum, maximize
+from scipy.sparse import csr_matrix
 
 
 class BipartiteMatching:
-    def __init__(self, matrix: np.ndarray):
-        self.matrix = matrix
-        self.n, self.m = matrix.shape
+    __slots__ = (
+        "matrix",
+        "n",
+        "m",
+        "matching",
+        "matched_col_of_row",
+        "matched_row_of_col",
+        "indptr",
+        "indices",
+    )
+
+    def __init__(self, matrix: np.ndarray | csr_matrix):
+        # 隣接リストをCSR形式（indptr, indices）で保持（CSRが渡された場合はコピーしない）
+        self.matrix = csr_matrix(matrix)
+        self.n, self.m = self.matrix.shape
+        self.matching: list[tuple[int, int]] = []
+        self.matched_col_of_row = np.full(self.n, -1)
+        self.matched_row_of_col = np.full(self.m, -1)
+        self.indptr = self.matrix.indptr
+        self.indices = self.matrix.indices
 
     def solve(self):
-        # MIPモデルの作成
-        model = Model("Bipartite Matching")
-
-        # 変数の作成（行と列のペアに対するバイナリ変数）
-        x = [
-            [model.add_var(var_type=BINARY) for _ in range(self.m)]
-            for _ in range(self.n)
-        ]
-
-        # 行ノードから列ノードへの制約
-        for i in range(self.n):
-            for j in range(self.m):
-                if self.matrix[i, j] != 0:  # エッジが存在する場合
-                    model.add_constr(x[i][j] <= 1)  # 容量1の制約
+        """Hopcroft-Karp法で最大マッチングを求める"""
+        n = self.n
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+
+        pair_u = [-1] * n  # 各行にマッチングされている列
+        pair_v = [-1] * self.m  # 各列にマッチングされている行
+        dist = [-1] * n  # 交互路の層（-1は到達不能）
+
+        def bfs() -> bool:
+            """未マッチの行から層グラフを構築し、増加路が存在するかを返す"""
+            queue = deque()
+            for u in range(n):
+                if pair_u[u] == -1:
+                    dist[u] = 0
+                    queue.append(u)
                 else:
-                    model.add_constr(x[i][j] == 0)
+                    dist[u] = -1
+
+            found = False
+            while queue:
+                u = queue.popleft()
+                for v in indices[indptr[u] : indptr[u + 1]]:
+                    w = pair_v[v]
+                    if w == -1:
+                        found = True
+                    elif dist[w] == -1:
+                        dist[w] = dist[u] + 1
+                        queue.append(w)
+            return found
 
-        # 各行ノードに対する制約（1つの列ノードにしか接続できない）
-        for i in range(self.n):
-            model.add_constr(xsum(x[i][j] for j in range(self.m)) <= 1)
+        def dfs(root: int, ptr: list[int]) -> bool:
+            """層グラフ上で root から増加路を探し、見つかればマッチングを更新"""
+            stack = [root]
+            while stack:
+                u = stack[-1]
+                advanced = False
+                while ptr[u] < indptr[u + 1]:
+                    v = indices[ptr[u]]
+                    w = pair_v[v]
+                    if w == -1:
+                        # 増加路に沿ってマッチングを反転
+                        for x in stack:
+                            y = indices[ptr[x]]
+                            pair_u[x] = y
+                            pair_v[y] = x
+                        return True
+                    if dist[w] == dist[u] + 1:
+                        stack.append(w)
+                        advanced = True
+                        break
+                    ptr[u] += 1
 
-        # 各列ノードに対する制約（1つの行ノードにしか接続できない）
-        for j in range(self.m):
-            model.add_constr(xsum(x[i][j] for i in range(self.n)) <= 1)
+                if not advanced:
+                    # 行き止まりの頂点はこのフェーズでは再訪しない
+                    dist[u] = -1
+                    stack.pop()
+                    if stack:
+                        ptr[stack[-1]] += 1
+            return False
 
-        # 目的関数の設定
-        model.objective = maximize(
-            xsum(x[i][j] for i in range(self.n) for j in range(self.m))
-        )
+        while bfs():
+            ptr = indptr[:-1]
+            for u in range(n):
+                if pair_u[u] == -1:
+                    dfs(u, ptr)
 
-        # 最適化の実行
-        model.optimize()
+        self.matched_col_of_row = np.array(pair_u)
+        self.matched_row_of_col = np.array(pair_v)
+        self.matching = [(i, j) for i, j in enumerate(pair_u) if j != -1]
 
         # 結果の表示
-        if model.status == OptimizationStatus.OPTIMAL:
-            print("最適解:")
-            for i in range(self.n):
-                for j in range(self.m):
-                    if x[i][j].x >= 0.99:  # バイナリ変数の値が1に近い場合
-                        print(f"行 {i + 1} と列 {j + 1} がマッチングされています。")
-        else:
-            print("最適解が見つかりませんでした。")
+        print("最大マッチング:")
+        for i, j in self.matching:
+            print(f"行 {i + 1} と列 {j + 1} がマッチングされています。")
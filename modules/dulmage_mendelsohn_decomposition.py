@@ -1,101 +1,146 @@
-from typing import List, Set, Tuple
+from typing import List, Tuple
 
 import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order
 
 from .strongly_connected_components import StronglyConnectedComponents
 
 
+def _alternating_reach(
+    edge_src: np.ndarray,
+    edge_dst: np.ndarray,
+    src_partner: np.ndarray,
+    dst_partner: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """未マッチの始点側頂点から交互路で到達できる頂点を求める
+
+    始点側の頂点 v から非マッチング辺で終点側の頂点 w へ進み、
+    w からはマッチング辺で始点側の頂点 dst_partner[w] へ戻る。
+    この有向グラフに未マッチの始点側頂点すべてへ辺を張る仮想始点を加え、
+    仮想始点からの幅優先探索で到達できる頂点を求める。
+    """
+    num_src = len(src_partner)
+    num_dst = len(dst_partner)
+    source = num_src + num_dst
+
+    unmatched_edges = src_partner[edge_src] != edge_dst
+    matched_dst = np.flatnonzero(dst_partner != -1)
+    starts = np.flatnonzero(src_partner == -1)
+
+    # 頂点: 始点側 0..num_src-1, 終点側 num_src..source-1, 仮想始点 source
+    tail = np.concatenate(
+        (edge_src[unmatched_edges], matched_dst + num_src, np.full(len(starts), source))
+    )
+    head = np.concatenate(
+        (edge_dst[unmatched_edges] + num_src, dst_partner[matched_dst], starts)
+    )
+    graph = csr_matrix(
+        (np.ones(len(tail), dtype=np.int8), (tail, head)),
+        shape=(source + 1, source + 1),
+    )
+
+    reached = breadth_first_order(
+        graph, source, directed=True, return_predecessors=False
+    )
+
+    src_reached = np.zeros(num_src, dtype=np.bool_)
+    dst_reached = np.zeros(num_dst, dtype=np.bool_)
+    src_reached[reached[reached < num_src]] = True
+    dst_reached[reached[(reached >= num_src) & (reached < source)] - num_src] = True
+
+    return src_reached, dst_reached
+
+
 class DulmageMendelsohnDecomposition:
-    def __init__(self, matrix: np.ndarray, matching: List[Tuple[int, int]]):
-        self.matrix = matrix
-        self.matching = matching
-        self.n = matrix.shape[0]
-        self.m = matrix.shape[1]
-        self.dM_rows = set(r for r, _ in matching)
-        self.dM_cols = set(c for _, c in matching)
+    __slots__ = (
+        "matrix",
+        "n",
+        "m",
+        "decomposition",
+        "has_v0",
+        "has_vinf",
+        "rows",
+        "cols",
+        "matched_rows",
+        "matched_cols",
+        "matched_col_of_row",
+        "matched_row_of_col",
+    )
+
+    def __init__(self, matrix: np.ndarray | csr_matrix, matched_col_of_row: np.ndarray):
+        self.matrix = csr_matrix(matrix)
+        self.n = self.matrix.shape[0]
+        self.m = self.matrix.shape[1]
         self.decomposition = None
         self.has_v0 = False
         self.has_vinf = False
 
-    def _find_Vinf(self) -> Tuple[Set[int], Set[int]]:
-        unmatched_rows = set(range(self.n)) - self.dM_rows
-
-        vinf_rows = set()
-        vinf_cols = set()
-        stack = list(unmatched_rows)
-
-        while stack:
-            v = stack.pop()
-            if v not in vinf_rows:
-                vinf_rows.add(v)
-                for c in range(self.m):
-                    if (
-                        self.matrix[v, c] != 0
-                        and (v, c) not in self.matching
-                        and c not in vinf_cols
-                    ):
-                        vinf_cols.add(c)
-                        for r, mc in self.matching:
-                            if mc == c and r not in vinf_rows:
-                                stack.append(r)
-
-        return vinf_rows, vinf_cols
-
-    def _find_V0(self) -> Tuple[Set[int], Set[int]]:
-        unmatched_cols = set(range(self.m)) - self.dM_cols
-
-        v0_rows = set()
-        v0_cols = set()
-        stack = list(unmatched_cols)
-
-        while stack:
-            c = stack.pop()
-            if c not in v0_cols:
-                v0_cols.add(c)
-                for r in range(self.n):
-                    if (
-                        self.matrix[r, c] != 0
-                        and (r, c) not in self.matching
-                        and r not in v0_rows
-                    ):
-                        v0_rows.add(r)
-                        for mr, c2 in self.matching:
-                            if mr == r and c2 not in v0_cols:
-                                stack.append(c2)
-
+        # 非零要素（辺）の行・列
+        self.rows, self.cols = self.matrix.nonzero()
+
+        # マッチング相手（マッチングされていなければ-1）と、マッチング辺の行・列
+        self.matched_col_of_row = np.asarray(matched_col_of_row)
+        self.matched_rows = np.flatnonzero(self.matched_col_of_row != -1)
+        self.matched_cols = self.matched_col_of_row[self.matched_rows]
+        self.matched_row_of_col = np.full(self.m, -1)
+        self.matched_row_of_col[self.matched_cols] = self.matched_rows
+
+    def _find_Vinf(self) -> Tuple[np.ndarray, np.ndarray]:
+        # 未マッチの行から出発し、行→列は非マッチング辺、列→行はマッチング辺
+        return _alternating_reach(
+            self.rows, self.cols, self.matched_col_of_row, self.matched_row_of_col
+        )
+
+    def _find_V0(self) -> Tuple[np.ndarray, np.ndarray]:
+        # 未マッチの列から出発し、列→行は非マッチング辺、行→列はマッチング辺
+        v0_cols, v0_rows = _alternating_reach(
+            self.cols, self.rows, self.matched_row_of_col, self.matched_col_of_row
+        )
         return v0_rows, v0_cols
 
     def solve(self) -> List[List[List[int]]]:
         v0_rows, v0_cols = self._find_V0()
         vinf_rows, vinf_cols = self._find_Vinf()
 
-        self.has_v0 = bool(v0_rows or v0_cols)
-        self.has_vinf = bool(vinf_rows or vinf_cols)
-
-        remove_rows = v0_rows.union(vinf_rows)
-        remove_cols = v0_cols.union(vinf_cols)
-
-        remaining_rows = sorted(set(range(self.n)) - remove_rows)
-        remaining_cols = sorted(set(range(self.m)) - remove_cols)
-        row_map = {old: new for new, old in enumerate(remaining_rows)}
-        col_map = {old: new for new, old in enumerate(remaining_cols)}
-
-        remaining_matrix = self.matrix[np.ix_(remaining_rows, remaining_cols)]
-
-        remaining_matching = []
-        for r, c in self.matching:
-            if r not in remove_rows and c not in remove_cols:
-                remaining_matching.append((row_map[r], col_map[c]))
+        self.has_v0 = bool(v0_rows.any() or v0_cols.any())
+        self.has_vinf = bool(vinf_rows.any() or vinf_cols.any())
+
+        remove_rows = v0_rows | vinf_rows
+        remove_cols = v0_cols | vinf_cols
+
+        remaining_rows = np.flatnonzero(~remove_rows)
+        remaining_cols = np.flatnonzero(~remove_cols)
+        # 元のインデックスから、残った行・列の中でのインデックスへの対応
+        row_map = np.cumsum(~remove_rows) - 1
+        col_map = np.cumsum(~remove_cols) - 1
+
+        # 残った行・列の間の辺だけを取り出し、インデックスを付け替えて疎行列を作る
+        kept_edges = ~remove_rows[self.rows] & ~remove_cols[self.cols]
+        remaining_matrix = csr_matrix(
+            (
+                np.ones(np.count_nonzero(kept_edges), dtype=np.int8),
+                (row_map[self.rows[kept_edges]], col_map[self.cols[kept_edges]]),
+            ),
+            shape=(len(remaining_rows), len(remaining_cols)),
+        )
+
+        # 残った行・列の中でのマッチング相手
+        keep = ~remove_rows[self.matched_rows] & ~remove_cols[self.matched_cols]
+        remaining_col_of_row = np.full(len(remaining_rows), -1)
+        remaining_col_of_row[row_map[self.matched_rows[keep]]] = col_map[
+            self.matched_cols[keep]
+        ]
 
         scc_components = []
-        if remaining_matching:
-            scc = StronglyConnectedComponents(remaining_matrix, remaining_matching)
+        if keep.any():
+            scc = StronglyConnectedComponents(remaining_matrix, remaining_col_of_row)
             scc_components = scc.find_sccs()
 
             scc_components = [
                 [
-                    [remaining_rows[r] for r in comp_rows],
-                    [remaining_cols[c] for c in comp_cols],
+                    remaining_rows[comp_rows].tolist(),
+                    remaining_cols[comp_cols].tolist(),
                 ]
                 for comp_rows, comp_cols in scc_components
             ]
@@ -103,12 +148,16 @@ class DulmageMendelsohnDecomposition:
         decomposition = []
 
         if self.has_v0:
-            decomposition.append([sorted(list(v0_rows)), sorted(list(v0_cols))])
+            decomposition.append(
+                [np.flatnonzero(v0_rows).tolist(), np.flatnonzero(v0_cols).tolist()]
+            )
 
         decomposition.extend(scc_components)
 
         if self.has_vinf:
-            decomposition.append([sorted(list(vinf_rows)), sorted(list(vinf_cols))])
+            decomposition.append(
+                [np.flatnonzero(vinf_rows).tolist(), np.flatnonzero(vinf_cols).tolist()]
+            )
 
         self.decomposition = decomposition
         return decomposition
@@ -146,7 +195,7 @@ class DulmageMendelsohnDecomposition:
         print("\n統計情報:")
         print(f"総頂点数: {total_rows + total_cols}")
         print(f"総成分数: {len(self.decomposition)}")
-        print(f"マッチングサイズ: {len(self.matching)}")
+        print(f"マッチングサイズ: {len(self.matched_rows)}")
 
     def print_compact(self):
         """DM分解の結果をコンパクトに出力"""
@@ -5,9 +5,15 @@ import pandas as pd
 class IOTable:
     def __init__(self, file_path):
         self.file_path = file_path
-        self.df = pd.read_excel(file_path, header=2, index_col=1)
+        # 中間投入部分（52部門）を含む範囲だけを読み込む
+        # 列: 番号列 + 部門名（インデックス）+ 52部門、行: 単位行 + 52部門
+        self.df = pd.read_excel(
+            file_path, header=2, index_col=1, usecols=range(54), nrows=53
+        )
         self.intermediate_df = self._extract_intermediate()
         self.filtered_intermediate_df = None
+        # (メソッド名, パラメータ, by_row) ごとのフィルタリング結果
+        self._filter_cache = {}
 
     def _extract_intermediate(self):
         rows = slice(1, 53)
@@ -56,20 +62,17 @@ class IOTable:
         by_row : bool
             行ごとに個別のパーセンテイルを適用するかどうか（デフォルト: False）
         """
-        filtered_df = self.intermediate_df.copy()
 
-        if by_row:
-            # 行ごとに個別のパーセンタイルを適用
-            for row in filtered_df.index:
-                threshold = filtered_df.loc[row].quantile(percentile / 100)
-                filtered_df.loc[row, filtered_df.loc[row] < threshold] = 0
-        else:
-            # 列ごとに個別のパーセンタイルを適用
-            for col in filtered_df.columns:
-                threshold = filtered_df[col].quantile(percentile / 100)
-                filtered_df.loc[filtered_df[col] < threshold, col] = 0
+        def compute(values):
+            # 行ごと（by_row=True）または列ごとに個別のパーセンタイルを適用
+            thresholds = np.nanquantile(
+                values, percentile / 100, axis=1 if by_row else 0, keepdims=True
+            )
+            return np.where(values < thresholds, 0, values)
 
-        self.filtered_intermediate_df = filtered_df
+        self._set_filtered_intermediate(
+            ("get_filtered_intermediate", percentile, by_row), compute
+        )
 
     def get_filtered_intermediate_by_percent(self, percentile=10, by_row=False):
         """
@@ -82,22 +85,23 @@ class IOTable:
         by_row : bool
             行ごとに個別のパーセンテイルを適用するかどうか（デフォルト: False）
         """
-        filtered_df = self.intermediate_df.copy()
-
-        if by_row:
-            # 行ごとに個別のパーセンテイルを適用
-            for row in filtered_df.index:
-                count = int(len(filtered_df.columns) * (percentile / 100))
-                threshold_indices = filtered_df.loc[row].nsmallest(count).index
-                filtered_df.loc[row, threshold_indices] = 0
-        else:
-            # 列ごとに個別のパーセンテイルを適用
-            for col in filtered_df.columns:
-                count = int(len(filtered_df) * (percentile / 100))
-                threshold_indices = filtered_df[col].nsmallest(count).index
-                filtered_df.loc[threshold_indices, col] = 0
-
-        self.filtered_intermediate_df = filtered_df
+
+        def compute(values):
+            axis = 1 if by_row else 0
+            count = int(values.shape[axis] * (percentile / 100))
+
+            # 行（列）ごとに下位count個の位置を取得し、その値を0にする
+            # （安定ソートにより、同値の場合は先に現れるものを優先する）
+            bottom_indices = np.take(
+                np.argsort(values, axis=axis, kind="stable"), range(count), axis=axis
+            )
+            filtered = values.copy()
+            np.put_along_axis(filtered, bottom_indices, 0, axis=axis)
+            return filtered
+
+        self._set_filtered_intermediate(
+            ("get_filtered_intermediate_by_percent", percentile, by_row), compute
+        )
 
     def filter_by_count(self, count: int, by_row: bool = False):
         """
@@ -110,26 +114,41 @@ class IOTable:
         by_row : bool
             行ごとに個別のカウントを適用するかどうか（デフォルト: False）
         """
-        filtered_df = self.intermediate_df.copy()
-
-        if by_row:
-            # 行ごとに指定された数だけ残す
-            for row in filtered_df.index:
-                # 各行の上位count個のインデックスを取得
-                top_indices = filtered_df.loc[row].nlargest(count).index
-                filtered_df.loc[
-                    row, filtered_df.loc[row] < filtered_df.loc[row, top_indices].min()
-                ] = 0
-        else:
-            # 列ごとに指定された数だけ残す
-            for col in filtered_df.columns:
-                # 各列の上位count個のインデックスを取得
-                top_indices = filtered_df[col].nlargest(count).index
-                filtered_df.loc[
-                    filtered_df[col] < filtered_df.loc[top_indices, col].min(), col
-                ] = 0
-
-        self.filtered_intermediate_df = filtered_df
+
+        def compute(values):
+            axis = 1 if by_row else 0
+
+            # 行（列）ごとにcount番目に大きい値を求め、それ未満の値を0にする
+            kth = min(count, values.shape[axis]) - 1
+            thresholds = -np.take(
+                np.partition(-values, kth, axis=axis), [kth], axis=axis
+            )
+            return np.where(values < thresholds, 0, values)
+
+        self._set_filtered_intermediate(("filter_by_count", count, by_row), compute)
+
+    def _set_filtered_intermediate(self, key, compute):
+        """
+        フィルタリング結果を計算してfiltered_intermediate_dfに設定します
+        同じ条件での結果はキャッシュし、再計算しません
+
+        Parameters:
+        -----------
+        key : tuple
+            フィルタリング条件（メソッド名, パラメータ, by_row）
+        compute : callable
+            intermediate_dfの値（ndarray）を受け取り、フィルタリング後の値を返す関数
+        """
+        if key not in self._filter_cache:
+            self._filter_cache[key] = compute(self.intermediate_df.to_numpy())
+
+        # キャッシュが書き換えられないよう、DataFrameにはコピーを渡す
+        self.filtered_intermediate_df = pd.DataFrame(
+            self._filter_cache[key],
+            index=self.intermediate_df.index,
+            columns=self.intermediate_df.columns,
+            copy=True,
+        )
 
     def save_filtered_intermediate(self, output_path):
         """
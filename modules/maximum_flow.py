@@ -1,69 +1,134 @@
+from collections import deque
+
 import numpy as np
-from mip import BINARY, Model, OptimizationStatus, maximize, xsum
+from scipy.sparse import csr_matrix
 
 
 class MaximumFlow:
-    def __init__(self, matrix: np.ndarray):
-        self.matrix = matrix
-        self.n, self.m = matrix.shape
+    __slots__ = (
+        "matrix",
+        "n",
+        "m",
+        "matching",
+        "matched_col_of_row",
+        "matched_row_of_col",
+        "source",
+        "sink",
+        "total_vertices",
+        "rows",
+        "cols",
+        "edge_from",
+        "edge_to",
+        "capacity",
+        "adj_edges",
+        "adj_indptr",
+    )
+
+    def __init__(self, matrix: np.ndarray | csr_matrix):
+        self.matrix = csr_matrix(matrix)
+        self.n, self.m = self.matrix.shape
         self.matching: list[tuple[int, int]] = []
+        self.matched_col_of_row = np.full(self.n, -1)
+        self.matched_row_of_col = np.full(self.m, -1)
 
-    def solve(self):
-        # MIPモデルの作成
-        model = Model("Maximum Flow")
-
-        # 変数の作成（行と列のペアに対するバイナリ変数）
-        x = [
-            [model.add_var(var_type=BINARY) for _ in range(self.m)]
-            for _ in range(self.n)
-        ]
-
-        # 始点から各行への流入量を表す変数
-        flow_from_source = [
-            model.add_var(var_type=BINARY, name=f"flow_from_source_{i}")
-            for i in range(self.n)
-        ]
-
-        # 各列から終点への流出量を表す変数
-        flow_to_sink = [
-            model.add_var(var_type=BINARY, name=f"flow_to_sink_{j}")
-            for j in range(self.m)
-        ]
-
-        # 行ノードから列ノードへの制約
-        for i in range(self.n):
-            for j in range(self.m):
-                if self.matrix[i, j] == 0:  # エッジが存在しない場合
-                    model.add_constr(x[i][j] == 0)  # 枝が存在しない
-
-        # 始点と終点を除いた各ノードの流出入は0
-        for i in range(self.n):
-            model.add_constr(
-                flow_from_source[i] - xsum(x[i][j] for j in range(self.m)) == 0
-            )
-        for j in range(self.m):
-            model.add_constr(
-                xsum(x[i][j] for i in range(self.n)) - flow_to_sink[j] == 0
-            )
-
-        objective_function = xsum(x[i][j] for i in range(self.n) for j in range(self.m))
-
-        model.add_constr(
-            xsum(flow_from_source[i] for i in range(self.n)) == objective_function
+        # フローネットワークの構築
+        # 頂点: 行 0..n-1, 列 n..n+m-1, 始点 n+m, 終点 n+m+1
+        self.source = self.n + self.m
+        self.sink = self.source + 1
+        self.total_vertices = self.sink + 1
+
+        self.rows, self.cols = self.matrix.nonzero()
+        tail = np.concatenate(
+            [np.full(self.n, self.source), self.rows, self.n + np.arange(self.m)]
+        )
+        head = np.concatenate(
+            [np.arange(self.n), self.n + self.cols, np.full(self.m, self.sink)]
+        )
+
+        # 辺 2k が順方向、2k+1 がその逆辺（e ^ 1 で互いに参照できる）
+        num_edges = 2 * len(tail)
+        self.edge_from = np.empty(num_edges, dtype=np.int64)
+        self.edge_to = np.empty(num_edges, dtype=np.int64)
+        self.edge_from[0::2], self.edge_from[1::2] = tail, head
+        self.edge_to[0::2], self.edge_to[1::2] = head, tail
+        self.capacity = np.zeros(num_edges, dtype=np.int64)
+        self.capacity[0::2] = 1
+
+        # 各頂点から出る辺をCSR形式（indptr, edges）で保持
+        self.adj_edges = np.argsort(self.edge_from, kind="stable")
+        self.adj_indptr = np.searchsorted(
+            self.edge_from[self.adj_edges], np.arange(self.total_vertices + 1)
         )
 
-        model.objective = maximize(objective_function)
+    def solve(self):
+        """Dinic法で最大フローを求め、行と列の最大マッチングを得る"""
+        source, sink = self.source, self.sink
+        total_vertices = self.total_vertices
+        indptr = self.adj_indptr.tolist()
+        adj_edges = self.adj_edges.tolist()
+        edge_from = self.edge_from.tolist()
+        edge_to = self.edge_to.tolist()
+        capacity = self.capacity.tolist()
+
+        def bfs() -> list[int]:
+            """始点からの残余グラフ上の距離（レベル）を求める"""
+            level = [-1] * total_vertices
+            level[source] = 0
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for e in adj_edges[indptr[u] : indptr[u + 1]]:
+                    v = edge_to[e]
+                    if capacity[e] > 0 and level[v] == -1:
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            return level
+
+        def augment(level: list[int], iter_ptr: list[int]) -> bool:
+            """レベルグラフ上で始点から終点への道を1本探して流す"""
+            path = []
+            u = source
+            while u != sink:
+                while iter_ptr[u] < indptr[u + 1]:
+                    e = adj_edges[iter_ptr[u]]
+                    if capacity[e] > 0 and level[edge_to[e]] == level[u] + 1:
+                        break
+                    iter_ptr[u] += 1
+                else:
+                    # 行き止まり：一つ前の頂点に戻って次の辺を試す
+                    if u == source:
+                        return False
+                    u = edge_from[path.pop()]
+                    iter_ptr[u] += 1
+                    continue
+                path.append(e)
+                u = edge_to[e]
+
+            # 容量はすべて1なので、道に沿って1だけ流す
+            for e in path:
+                capacity[e] -= 1
+                capacity[e ^ 1] += 1
+            return True
+
+        while True:
+            level = bfs()
+            if level[sink] == -1:
+                break
+            iter_ptr = indptr[:-1]
+            while augment(level, iter_ptr):
+                pass
+
+        self.capacity = np.array(capacity, dtype=np.int64)
 
-        # 最適化の実行
-        model.optimize()
+        # 行から列への順方向辺のうち、容量が0になったもの（フローが流れた辺）がマッチング
+        edge_ids = 2 * (self.n + np.arange(len(self.rows)))
+        flowed = self.capacity[edge_ids] == 0
+        matched_rows, matched_cols = self.rows[flowed], self.cols[flowed]
+        self.matched_col_of_row[matched_rows] = matched_cols
+        self.matched_row_of_col[matched_cols] = matched_rows
+        self.matching = list(zip(matched_rows.tolist(), matched_cols.tolist()))
 
         # 結果の表示
-        if model.status == OptimizationStatus.OPTIMAL:
-            print("最適解:")
-            for i in range(self.n):
-                for j in range(self.m):
-                    if x[i][j].x >= 0.99:  # バイナリ変数の値が1に近い場合
-                        print(f"行 {i + 1} と列 {j + 1} がマッチングされています。")
-                        self.matching.append((i, j))
-        else:
-            print("最適解が見つかりませんでした。")
+        print("最大フロー:")
+        for i, j in self.matching:
+            print(f"行 {i + 1} と列 {j + 1} がマッチングされています。")